@@ -0,0 +1,261 @@
+import contextlib
+import io
+import random
+import sys
+
+import numpy as np
+
+import project
+from project import Snapshot, SCHEMA, DB_BACKEND, get_db_connection, release_db_connection
+
+# Offline engine answering functions 5-8 for every key at once from NumPy
+# column arrays, loaded once from the database or from an exportSnapshot file:
+#   python analytics.py listInternetService [snapshot]
+#   python analytics.py countCustomizedModel [snapshot]
+#   python analytics.py topNDurationConfig N [snapshot]
+#   python analytics.py listBaseModelKeyWord keyword [snapshot]
+#   python analytics.py verify [samples] [snapshot]
+# Per-key reports print a "# <function> <key>" line before each key's rows,
+# which are the lines the SQL function prints for that key. Where the SQL
+# leaves the order of ties open, ties come out in key order (sid for
+# listInternetService, cid for topNDurationConfig), as both backends'
+# plans return them. verify compares a sample of keys with the SQL functions.
+
+TABLE_COLUMNS = {
+    "BaseModel": ("bmid", "description"),
+    "CustomizedModel": ("bmid",),
+    "ModelServices": ("bmid", "sid"),
+    "InternetService": ("sid", "provider", "endpoints"),
+    "LLMService": ("sid", "domain"),
+    "Configuration": ("cid", "client_uid", "labels", "content"),
+    "ModelConfigurations": ("cid", "duration")
+}
+
+
+def _column_array(values, col_type):
+    if col_type in ('INT', 'BIGINT'):
+        return np.array(values, dtype=np.int64)
+    return np.array(values, dtype=object)
+
+
+def _load_rows(source, table, names):
+    if isinstance(source, Snapshot):
+        positions = [[c[0] for c in SCHEMA[table]['columns']].index(name) for name in names]
+        for batch in source.batches(table, 100000):
+            yield from ([row[i] for i in positions] for row in batch)
+        return
+    source.execute(f"SELECT {', '.join(names)} FROM {table}")
+    yield from project._stream_rows(source)
+
+
+def load_tables(snapshot_file=None):
+    # {table: {column: array}} for the columns functions 5-8 read
+    if snapshot_file:
+        source = Snapshot(snapshot_file)
+        conn = None
+    else:
+        conn = get_db_connection()
+        if not conn:
+            sys.exit(1)
+        source = conn.cursor(buffered=False)
+    try:
+        tables = {}
+        for table, names in TABLE_COLUMNS.items():
+            types = {c[0]: c[1] for c in SCHEMA[table]['columns']}
+            columns = list(zip(*_load_rows(source, table, names))) or [()] * len(names)
+            tables[table] = {name: _column_array(values, types[name])
+                             for name, values in zip(names, columns)}
+        return tables
+    finally:
+        source.close()
+        if conn is not None:
+            release_db_connection(conn)
+
+
+def _text_rank(values):
+    # Sort rank of each string under the backend's comparison: MySQL's
+    # default collation ignores case, SQLite's compares bytes
+    if DB_BACKEND == 'mysql':
+        values = np.array([v.casefold() for v in values], dtype=object)
+    _, rank = np.unique(values.astype(str), return_inverse=True)
+    return rank
+
+
+def _lookup(keys, wanted):
+    # Row index in keys (a primary key column) of every value in wanted
+    order = np.argsort(keys, kind='stable')
+    return order[np.searchsorted(keys, wanted, sorter=order)]
+
+
+def _segments(sorted_keys):
+    # Start offsets of the runs of equal values in a sorted array
+    if not len(sorted_keys):
+        return np.array([], dtype=np.int64)
+    return np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+
+
+class Analytics:
+    def __init__(self, tables):
+        self.t = tables
+
+    def list_internet_service(self):
+        # {bmid: [(sid, endpoints, provider)]} ordered by provider, as listInternetService
+        ms, s = self.t["ModelServices"], self.t["InternetService"]
+        rows = _lookup(s["sid"], ms["sid"])
+        order = np.lexsort((ms["sid"], _text_rank(s["provider"])[rows], ms["bmid"]))
+        bmids, sids = ms["bmid"][order], ms["sid"][order]
+        endpoints, providers = s["endpoints"][rows[order]], s["provider"][rows[order]]
+        result = {bmid: [] for bmid in self.t["BaseModel"]["bmid"].tolist()}
+        starts = _segments(bmids)
+        for start, end in zip(starts, np.r_[starts[1:], len(bmids)]):
+            result[int(bmids[start])] = list(zip(sids[start:end].tolist(), endpoints[start:end],
+                                                 providers[start:end]))
+        return result
+
+    def count_customized_model(self):
+        # [(bmid, description, count)] for every base model, as countCustomizedModel
+        bm = self.t["BaseModel"]
+        order = np.argsort(bm["bmid"], kind='stable')
+        positions = np.searchsorted(bm["bmid"], self.t["CustomizedModel"]["bmid"], sorter=order)
+        counts = np.bincount(positions, minlength=len(order))
+        return list(zip(bm["bmid"][order].tolist(), bm["description"][order], counts.tolist()))
+
+    def _config_max_duration(self):
+        # (cids, max durations) via a segment max over ModelConfigurations sorted by cid
+        mc = self.t["ModelConfigurations"]
+        order = np.argsort(mc["cid"], kind='stable')
+        cids = mc["cid"][order]
+        starts = _segments(cids)
+        if not len(starts):
+            return cids, cids
+        return cids[starts], np.maximum.reduceat(mc["duration"][order], starts)
+
+    def top_n_duration_config(self, n):
+        # {client_uid: [(client_uid, cid, labels, content, max_duration)]}, as topNDurationConfig
+        c = self.t["Configuration"]
+        cids, durations = self._config_max_duration()
+        rows = _lookup(c["cid"], cids)
+        clients = c["client_uid"][rows]
+        order = np.lexsort((cids, -durations, clients))
+        clients, cids, durations, rows = clients[order], cids[order], durations[order], rows[order]
+        starts = _segments(clients)
+        # Rank within each client's run; the first n of every run are its top n
+        rank = np.arange(len(clients)) - np.repeat(starts, np.diff(np.r_[starts, len(clients)]))
+        keep = rank < n
+        clients, cids, durations, rows = clients[keep], cids[keep], durations[keep], rows[keep]
+        result = {}
+        for uid, cid, labels, content, duration in zip(clients.tolist(), cids.tolist(), c["labels"][rows],
+                                                       c["content"][rows], durations.tolist()):
+            result.setdefault(uid, []).append((uid, cid, labels, content, duration))
+        return result
+
+    def top_n_duration_for(self, uid, n):
+        # One client's top n, picked with argpartition rather than a full sort
+        c = self.t["Configuration"]
+        cids, durations = self._config_max_duration()
+        rows = _lookup(c["cid"], cids)
+        mine = np.flatnonzero(c["client_uid"][rows] == uid)
+        if len(mine) > n:
+            cut = -np.partition(-durations[mine], n - 1)[n - 1]
+            # Everything above the n-th largest, plus enough of its ties
+            mine = mine[durations[mine] >= cut]
+        mine = mine[np.lexsort((cids[mine], -durations[mine]))][:n]
+        return [(uid, int(cid), c["labels"][r], c["content"][r], int(d))
+                for cid, r, d in zip(cids[mine], rows[mine], durations[mine])]
+
+    def list_base_model_keyword(self, keyword):
+        # [(bmid, sid, provider, domain)], first five by bmid, as listBaseModelKeyWord
+        llm, ms, s = self.t["LLMService"], self.t["ModelServices"], self.t["InternetService"]
+        domains = np.array(['' if d is None else d for d in llm["domain"]], dtype=str)
+        hits = np.char.find(np.char.lower(domains), str(keyword).lower()) >= 0
+        hits &= np.array([d is not None for d in llm["domain"]], dtype=bool)
+        matched = np.isin(ms["sid"], llm["sid"][hits])
+        bmids, sids = ms["bmid"][matched], ms["sid"][matched]
+        order = np.lexsort((sids, bmids))[:5]
+        srows, lrows = _lookup(s["sid"], sids[order]), _lookup(llm["sid"], sids[order])
+        return list(zip(bmids[order].tolist(), sids[order].tolist(), s["provider"][srows],
+                        llm["domain"][lrows]))
+
+
+def _print_blocks(name, blocks):
+    for key, rows in blocks.items():
+        print(f"# {name} {key}")
+        project._write_rows(rows)
+
+
+def _sql_output(func, *args):
+    project.result_cache.clear()
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        func(*args)
+    return buf.getvalue()
+
+
+def _engine_output(rows):
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        project._write_rows(rows)
+    return buf.getvalue()
+
+
+def verify(engine, samples):
+    # Compares the engine with the SQL functions on a sample of keys
+    rng = random.Random(42)
+    services = engine.list_internet_service()
+    counts = engine.count_customized_model()
+    top = engine.top_n_duration_config(5)
+    checks = []
+    for bmid in rng.sample(sorted(services), min(samples, len(services))):
+        checks.append((f"listInternetService {bmid}", services[bmid],
+                       lambda b=bmid: _sql_output(project.listInternetService, b)))
+    for row in rng.sample(counts, min(samples, len(counts))):
+        checks.append((f"countCustomizedModel {row[0]}", [row],
+                       lambda b=row[0]: _sql_output(project.countCustomizedModel, b)))
+    for uid in rng.sample(sorted(top), min(samples, len(top))):
+        checks.append((f"topNDurationConfig {uid} 5", top[uid],
+                       lambda u=uid: _sql_output(project.topNDurationConfig, u, 5)))
+        checks.append((f"topNDurationConfig {uid} 5 (argpartition)", engine.top_n_duration_for(uid, 5),
+                       lambda u=uid: _sql_output(project.topNDurationConfig, u, 5)))
+    for keyword in ("chat", "code", "vid", "o", "zz"):
+        checks.append((f"listBaseModelKeyWord {keyword}", engine.list_base_model_keyword(keyword),
+                       lambda k=keyword: _sql_output(project.listBaseModelKeyWord, k)))
+    mismatches = 0
+    for name, rows, sql in checks:
+        if _engine_output(rows) != sql():
+            mismatches += 1
+            print(f"{name},Fail")
+    print(f"checked,{len(checks)}")
+    print(f"mismatches,{mismatches}")
+    return mismatches == 0
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python analytics.py <function> [arg] [snapshot]")
+        sys.exit(1)
+    name, args = sys.argv[1], sys.argv[2:]
+    takes_arg = name in ("topNDurationConfig", "listBaseModelKeyWord", "verify")
+    snapshot_file = args[1] if takes_arg and len(args) > 1 else (args[0] if not takes_arg and args else None)
+    engine = Analytics(load_tables(snapshot_file))
+    try:
+        if name == "listInternetService":
+            _print_blocks(name, engine.list_internet_service())
+        elif name == "countCustomizedModel":
+            project._write_rows(engine.count_customized_model())
+        elif name == "topNDurationConfig":
+            _print_blocks(name, engine.top_n_duration_config(int(args[0])))
+        elif name == "listBaseModelKeyWord":
+            project._write_rows(engine.list_base_model_keyword(args[0]))
+        elif name == "verify":
+            if not verify(engine, int(args[0]) if args else 50):
+                sys.exit(1)
+        else:
+            print(f"Function '{name}' not found")
+            sys.exit(1)
+    finally:
+        if project._pool is not None:
+            project._pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import contextlib
+import csv
+import io
+import sys
+import time
+
+import project
+from benchmark import sample_args
+
+# Rows/sec of functions 5-8 through the library API against the CLI path an
+# embedding caller had before it: capture the printed output and parse it
+# back as CSV. Runs against the configured database (CS122A_BACKEND).
+#   python bench_api.py [repeat]
+# Arguments are drawn from the loaded data as in benchmark.py, with wider
+# calls so each returns enough rows to time. The result cache is cleared
+# before every call so both paths read from the database.
+
+CLI_FUNCTIONS = {
+    "listInternetService": (project.listInternetService, project.list_internet_service),
+    "countCustomizedModel": (project.countCustomizedModel, project.count_customized_model),
+    "topNDurationConfig": (project.topNDurationConfig, project.top_n_duration_config),
+    "listBaseModelKeyWord": (project.listBaseModelKeyWord, project.list_base_model_keyword)
+}
+
+# bmids per countCustomizedModel call and N per topNDurationConfig call
+COUNT_WIDTH = 100
+TOP_N = 1000
+
+
+def cli_rows(func, *args):
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        func(*args)
+    return list(csv.reader(io.StringIO(buf.getvalue())))
+
+
+def api_rows(func, *args):
+    return list(func(*args))
+
+
+def rows_per_sec(path, func, calls):
+    rows = 0
+    start = time.perf_counter()
+    for args in calls:
+        project.result_cache.clear()
+        rows += len(path(func, *args))
+    elapsed = time.perf_counter() - start
+    return rows, rows / elapsed if elapsed else 0.0
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    args = sample_args(repeat)
+    bmids = [a[0] for a in args["countCustomizedModel"]]
+    calls = {
+        "listInternetService": args["listInternetService"],
+        "countCustomizedModel": [tuple(bmids[(i + k) % len(bmids)] for k in range(COUNT_WIDTH))
+                                 for i in range(repeat)],
+        "topNDurationConfig": [(uid, TOP_N) for uid, _ in args["topNDurationConfig"]],
+        "listBaseModelKeyWord": args["listBaseModelKeyWord"]
+    }
+    try:
+        print("function,rows,cli_rows_per_sec,api_rows_per_sec,speedup")
+        for name, (cli, api) in CLI_FUNCTIONS.items():
+            rows, cli_rate = rows_per_sec(cli_rows, cli, calls[name])
+            _, api_rate = rows_per_sec(api_rows, api, calls[name])
+            speedup = f"{api_rate / cli_rate:.2f}x" if cli_rate else "-"
+            print(f"{name},{rows},{cli_rate:.0f},{api_rate:.0f},{speedup}")
+    finally:
+        if project._pool is not None:
+            project._pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import csv
+import os
+import sys
+import time
+from datetime import datetime
+
+from project import TABLE_DDL, compile_row_converter
+
+# Micro-benchmark: cells/sec of the schema-compiled converters against the
+# original per-value guessing loop from import_data.
+#   python bench_convert.py [data_folder] [repeat]
+
+
+def legacy_convert(rows):
+    processed = []
+    for r in rows:
+        new_row = []
+        for val in r:
+            if val.upper() == 'NULL' or val == '':
+                new_row.append(None)
+            elif val.isdigit():
+                new_row.append(int(val))
+            elif '-' in val:
+                try:
+                    new_row.append(datetime.strptime(val, '%Y-%m-%d').date())
+                except:
+                    new_row.append(val)
+            else:
+                new_row.append(val)
+        processed.append(tuple(new_row))
+    return processed
+
+
+def compiled_convert(rows, convert_row):
+    return [convert_row(r) for r in rows]
+
+
+def best_of(repeat, func, *args):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    folder = sys.argv[1] if len(sys.argv) > 1 else "test_data_project_122a"
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    total_legacy = total_compiled = total_cells = 0
+    print("table,cells,legacy_cells_per_sec,compiled_cells_per_sec,speedup")
+    for table in TABLE_DDL:
+        csv_file = os.path.join(folder, f"{table}.csv")
+        if not os.path.exists(csv_file):
+            continue
+        with open(csv_file, newline='') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            rows = list(reader)
+        # Small sample files are repeated so timings are measurable
+        if rows and len(rows) < 10000:
+            rows = rows * (10000 // len(rows) + 1)
+        cells = sum(len(r) for r in rows)
+        if not cells:
+            continue
+        legacy = best_of(repeat, legacy_convert, rows)
+        compiled = best_of(repeat, compiled_convert, rows, compile_row_converter(table))
+        total_legacy += legacy
+        total_compiled += compiled
+        total_cells += cells
+        print(f"{table},{cells},{cells / legacy:.0f},{cells / compiled:.0f},{legacy / compiled:.2f}x")
+    if total_cells:
+        print(f"ALL,{total_cells},{total_cells / total_legacy:.0f},"
+              f"{total_cells / total_compiled:.0f},{total_legacy / total_compiled:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
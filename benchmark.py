@@ -0,0 +1,152 @@
+import contextlib
+import json
+import os
+import random
+import resource
+import sys
+import time
+from datetime import datetime
+
+import project
+from project import func_map, get_db_connection, release_db_connection, result_cache
+
+# Per-function benchmark against the configured database:
+#   python benchmark.py results.json [data_folder] [repeat] [baseline.json]
+# With a data folder the run starts with a timed import of it (for instance
+# one written by gen_data.py). Functions 2-8 are then called `repeat` times
+# each with arguments drawn from the loaded data, and their latency
+# percentiles, throughput and the process's peak RSS are stored as JSON.
+# Passing an earlier results file prints p50 against that run.
+# The result cache is cleared before every call, so the numbers are for the
+# database path; function output goes to /dev/null.
+# deleteBaseModel runs last because it removes the models it is given.
+
+SEED = 42
+
+
+def sample_args(repeat):
+    rng = random.Random(SEED)
+    conn = get_db_connection()
+    if not conn:
+        sys.exit(1)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT bmid FROM BaseModel")
+        bmids = [r[0] for r in cursor.fetchall()]
+        cursor.execute("SELECT DISTINCT client_uid FROM Configuration")
+        client_uids = [r[0] for r in cursor.fetchall()]
+        cursor.execute("SELECT COALESCE(MAX(uid), 0) FROM User")
+        max_uid = cursor.fetchone()[0]
+        cursor.execute("SELECT COALESCE(MAX(mid), 0) FROM CustomizedModel")
+        max_mid = cursor.fetchone()[0]
+        cursor.close()
+    finally:
+        release_db_connection(conn)
+    if not bmids or not client_uids:
+        print("Benchmark needs loaded data")
+        sys.exit(1)
+    picks = lambda values: [rng.choice(values) for _ in range(repeat)]
+    keywords = ["chat", "code", "video", "general", "vision"]
+    # Deletes take distinct models from the top so reads above are unaffected
+    doomed = sorted(bmids)[-min(repeat, len(bmids)):]
+    return {
+        # New uids above every existing User: insertAgentClient creates the
+        # User row first, so each call is a real two-row insert
+        "insertAgentClient": [
+            (max_uid + i + 1, f"bench_{max_uid + i + 1}", f"bench_{max_uid + i + 1}@example.com",
+             1234567812345678, f"Bench {i}", "2030-01-01", 123, 12345, "Tools")
+            for i in range(repeat)],
+        "addCustomizedModel": [(max_mid + i + 1, bmid) for i, bmid in enumerate(picks(bmids))],
+        "listInternetService": [(bmid,) for bmid in picks(bmids)],
+        "countCustomizedModel": [(bmid,) for bmid in picks(bmids)],
+        "topNDurationConfig": [(uid, 5) for uid in picks(client_uids)],
+        "listBaseModelKeyWord": [(kw,) for kw in picks(keywords)],
+        "deleteBaseModel": [(bmid,) for bmid in doomed]
+    }
+
+
+def percentile(values, pct):
+    # Nearest-rank percentile of a sorted list
+    index = max(0, min(len(values) - 1, int(round(pct / 100 * len(values))) - 1))
+    return values[index]
+
+
+def summarize(latencies, failures=0):
+    latencies = sorted(latencies)
+    total = sum(latencies)
+    return {
+        "calls": len(latencies),
+        # Calls that returned False; their latency is the failure path's
+        "failures": failures,
+        "mean_ms": total / len(latencies) * 1000,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p90_ms": percentile(latencies, 90) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": latencies[-1] * 1000,
+        "throughput_per_sec": len(latencies) / total if total else None,
+        # ru_maxrss is in KB on Linux; it only grows, so this is the peak so far
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    }
+
+
+def time_calls(func, calls):
+    latencies, failures = [], 0
+    with open(os.devnull, 'w') as sink, contextlib.redirect_stdout(sink):
+        for args in calls:
+            result_cache.clear()
+            start = time.perf_counter()
+            result = func(*args)
+            latencies.append(time.perf_counter() - start)
+            failures += result is False
+    return latencies, failures
+
+
+def compare(results, baseline_file):
+    with open(baseline_file) as f:
+        baseline = json.load(f)["functions"]
+    print("function,p50_ms,baseline_p50_ms,ratio")
+    for name, stats in results.items():
+        if name not in baseline:
+            continue
+        old = baseline[name]["p50_ms"]
+        ratio = f"{stats['p50_ms'] / old:.2f}x" if old else "-"
+        print(f"{name},{stats['p50_ms']:.3f},{old:.3f},{ratio}")
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python benchmark.py results.json [data_folder] [repeat] [baseline.json]")
+        sys.exit(1)
+    out_file = sys.argv[1]
+    folder = sys.argv[2] if len(sys.argv) > 2 and sys.argv[2] != '-' else None
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    baseline_file = sys.argv[4] if len(sys.argv) > 4 else None
+
+    results = {}
+    try:
+        if folder:
+            results["import"] = summarize(*time_calls(func_map["import"], [(folder,)]))
+        for name, calls in sample_args(repeat).items():
+            results[name] = summarize(*time_calls(func_map[name], calls))
+    finally:
+        if project._pool is not None:
+            project._pool.close()
+
+    report = {
+        "started": datetime.now().isoformat(timespec='seconds'),
+        "data_folder": folder,
+        "repeat": repeat,
+        "functions": results
+    }
+    with open(out_file, 'w') as f:
+        json.dump(report, f, indent=2)
+    print("function,calls,failures,p50_ms,p90_ms,p99_ms,per_sec,peak_rss_kb")
+    for name, s in results.items():
+        print(f"{name},{s['calls']},{s['failures']},{s['p50_ms']:.3f},{s['p90_ms']:.3f},{s['p99_ms']:.3f},"
+              f"{s['throughput_per_sec'] or 0:.1f},{s['peak_rss_kb']}")
+    if baseline_file:
+        compare(results, baseline_file)
+
+
+if __name__ == "__main__":
+    main()
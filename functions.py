@@ -1,6 +1,5 @@
 import sys
-import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, pooling
 import csv
 import os
 
@@ -11,9 +10,17 @@ DB_CONFIG = {
     'database': 'db_name' 
 }
 
+# mysql.connector's own pool, opened on first use; close() on a pooled
+# connection hands it back instead of disconnecting
+POOL_SIZE = 5
+_pool = None
+
 def get_db_connection():
+    global _pool
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
+        if _pool is None:
+            _pool = pooling.MySQLConnectionPool(pool_name="functions", pool_size=POOL_SIZE, **DB_CONFIG)
+        connection = _pool.get_connection()
         return connection
     except Error as e:
         print(f"Error connecting to MySQL: {e}")
@@ -155,6 +162,7 @@ def import_data(folder_name):
     finally:
         if connection and connection.is_connected():
             cursor.close()
+        if connection:
             connection.close()
 
 # function 2: insert agent client
@@ -190,6 +198,7 @@ def insertAgentClient(uid, username, email, card_number, card_holder,
     finally:
         if connection and connection.is_connected():
             cursor.close()
+        if connection:
             connection.close()
 
 #function 3: add a customized model
@@ -223,6 +232,7 @@ def addCustomizedModel(mid, bmid):
     finally:
         if connection and connection.is_connected():
             cursor.close()
+        if connection:
             connection.close()
 
 #function 4: delete a base model
@@ -253,6 +263,7 @@ def deleteBaseModel(bmid):
     finally:
         if connection and connection.is_connected():
             cursor.close()
+        if connection:
             connection.close()
 
 
@@ -288,7 +299,7 @@ def listInternetService(bmid):
     finally:
         if cursor:
             cursor.close()
-        if conn and conn.is_connected():
+        if conn:
             conn.close()
 
 # function 6: count customized model
@@ -326,7 +337,7 @@ def countCustomizedModel(*bmids):
     finally:
         if cursor:
             cursor.close()
-        if conn and conn.is_connected():
+        if conn:
             conn.close()
 
 # function 7: find top-n longest duration configuration
@@ -361,7 +372,7 @@ def topNDurationConfig(uid, N):
     finally:
         if cursor:
             cursor.close()
-        if conn and conn.is_connected():
+        if conn:
             conn.close()
 
 # function 8: keyword search
@@ -398,5 +409,5 @@ def listBaseModelKeyWord(keyword):
     finally:
         if cursor:
             cursor.close()
-        if conn and conn.is_connected():
+        if conn:
             conn.close()
\ No newline at end of file
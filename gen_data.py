@@ -0,0 +1,166 @@
+import csv
+import os
+import random
+import sys
+
+from project import TABLE_DDL, SCHEMA
+
+# Synthetic dataset generator: writes the 11 table CSVs in the shape of the
+# sample folder, scaled to roughly `rows` rows in total.
+#   python gen_data.py out_folder rows [skew] [seed] [sample_folder]
+# skew 0 spreads child rows evenly over their parents; larger values pile
+# them onto the low ids (a handful of hot base models, clients, services).
+# Rows are written as they are generated, so memory stays flat at any scale.
+
+SAMPLE_FOLDER = "test_data_project_122a"
+
+PROVIDERS = ["Local", "Anthropic", "OpenAI", "Google"]
+DOMAINS = ["chat", "code", "video", "general", "vision", "speech"]
+STORAGE_TYPES = ["sql", "s3", "blob", "nosql"]
+LABELS = ["prod", "dev", "test", "prod;test", "dev;test"]
+INTERESTS = ["Tools", "NLP", "CV", "Games", "Tools;NLP", "Tools;Games;NLP", "CV;NLP"]
+DESCRIPTION_WORDS = ["chat", "code", "vision", "speech", "general", "video", "reasoning"]
+
+
+def sample_counts(folder):
+    counts = {}
+    for table in TABLE_DDL:
+        with open(os.path.join(folder, f"{table}.csv"), newline='') as f:
+            counts[table] = sum(1 for _ in f) - 1
+    return counts
+
+
+def table_sizes(rows, counts):
+    total = sum(counts.values())
+    sizes = {t: max(1, round(c * rows / total)) for t, c in counts.items()}
+    # Subtype tables share their parent's keys, so they cannot outgrow it
+    for child, parent in (("AgentCreator", "User"), ("AgentClient", "User"),
+                          ("LLMService", "InternetService"), ("DataStorage", "InternetService")):
+        sizes[child] = min(sizes[child], sizes[parent])
+    return sizes
+
+
+def skewed(u, n, skew):
+    # Maps a uniform u in [0, 1) to an index in [0, n), biased towards 0
+    return min(n - 1, int(n * u ** (1 + skew)))
+
+
+def hashed(i, seed):
+    # Deterministic uniform value per key, for picks that must repeat
+    # without remembering them (Fibonacci hashing)
+    return ((i * 0x9E3779B1 + seed) & 0xFFFFFFFF) / 0x100000000
+
+
+def generate(folder, rows, skew=1.0, seed=42, sample=SAMPLE_FOLDER):
+    rng = random.Random(seed)
+    n = table_sizes(rows, sample_counts(sample))
+    pick = lambda size: skewed(rng.random(), size, skew)
+    # Creators take the low uids and clients the high ones, so with enough
+    # users some users are both, as in the sample
+    creator_uid = lambda i: i + 1
+    client_uid = lambda i: n["User"] - n["AgentClient"] + i + 1
+    llm_sid = lambda i: i + 1
+    storage_sid = lambda i: n["InternetService"] - n["DataStorage"] + i + 1
+    customized_bmid = lambda j: skewed(hashed(j, seed), n["BaseModel"], skew) + 1
+
+    def users():
+        for i in range(n["User"]):
+            uid = i + 1
+            yield uid, f"user_{uid}@example.com", f"user_{uid}"
+
+    def creators():
+        for i in range(n["AgentCreator"]):
+            uid = creator_uid(i)
+            yield uid, f"Bio of user {uid}", f"payout_{uid:06x}"
+
+    def clients():
+        for i in range(n["AgentClient"]):
+            uid = client_uid(i)
+            yield (uid, rng.choice(INTERESTS), f"User {uid}",
+                   f"{rng.randint(2026, 2030)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                   rng.randint(10000, 99999), rng.randint(100, 999), rng.randint(10000, 99999))
+
+    def base_models():
+        for i in range(n["BaseModel"]):
+            bmid = i + 1
+            yield (bmid, creator_uid(pick(n["AgentCreator"])),
+                   f"Base model {bmid} {rng.choice(DESCRIPTION_WORDS)} description")
+
+    def customized_models():
+        # mid is unique on its own, so the (bmid, mid) key never collides
+        for j in range(n["CustomizedModel"]):
+            yield customized_bmid(j), j + 1
+
+    def configurations():
+        for i in range(n["Configuration"]):
+            cid = i + 1
+            yield cid, client_uid(pick(n["AgentClient"])), f"Config content {cid}", rng.choice(LABELS)
+
+    def internet_services():
+        for i in range(n["InternetService"]):
+            sid = i + 1
+            provider = PROVIDERS[pick(len(PROVIDERS))]
+            yield sid, provider, f"https://{provider.lower()}{sid}.example.com/v1"
+
+    def llm_services():
+        for i in range(n["LLMService"]):
+            yield llm_sid(i), rng.choice(DOMAINS)
+
+    def data_storage():
+        for i in range(n["DataStorage"]):
+            yield storage_sid(i), rng.choice(STORAGE_TYPES)
+
+    def model_services():
+        # Row i pairs base model i % B with the k-th service after a skewed
+        # start, k = i // B, so (bmid, sid) stays unique without a seen-set
+        bm, services = n["BaseModel"], n["InternetService"]
+        for i in range(min(n["ModelServices"], bm * services)):
+            b, k = i % bm, i // bm
+            sid = (skewed(hashed(b, seed), services, skew) + k) % services
+            yield b + 1, sid + 1, rng.randint(1, 5)
+
+    def model_configurations():
+        # Same scheme over (customized model, configuration) pairs
+        cm, configs = n["CustomizedModel"], n["Configuration"]
+        for i in range(min(n["ModelConfigurations"], cm * configs)):
+            j, k = i % cm, i // cm
+            cid = (skewed(hashed(j + cm, seed), configs, skew) + k) % configs
+            yield customized_bmid(j), j + 1, cid + 1, rng.randint(1, 1000)
+
+    generators = {
+        "User": users, "AgentCreator": creators, "AgentClient": clients,
+        "BaseModel": base_models, "CustomizedModel": customized_models,
+        "Configuration": configurations, "InternetService": internet_services,
+        "LLMService": llm_services, "DataStorage": data_storage,
+        "ModelServices": model_services, "ModelConfigurations": model_configurations
+    }
+    os.makedirs(folder, exist_ok=True)
+    written = {}
+    for table in TABLE_DDL:
+        with open(os.path.join(folder, f"{table}.csv"), 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow([c[0] for c in SCHEMA[table]['columns']])
+            count = 0
+            for row in generators[table]():
+                writer.writerow(row)
+                count += 1
+        written[table] = count
+    return written
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Usage: python gen_data.py out_folder rows [skew] [seed] [sample_folder]")
+        sys.exit(1)
+    folder, rows = sys.argv[1], int(sys.argv[2])
+    skew = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+    seed = int(sys.argv[4]) if len(sys.argv) > 4 else 42
+    sample = sys.argv[5] if len(sys.argv) > 5 else SAMPLE_FOLDER
+    written = generate(folder, rows, skew, seed, sample)
+    for table, count in written.items():
+        print(f"{table},{count}")
+    print(f"ALL,{sum(written.values())}")
+
+
+if __name__ == "__main__":
+    main()
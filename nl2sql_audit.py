@@ -0,0 +1,179 @@
+import json
+import re
+import sqlite3
+import sys
+import time
+
+import project
+from project import read_nl2sql, _plan_nodes, _uses_filesort
+from nl2sql_eval import READ_ONLY, ER_QUERY_TIMEOUT, connect_read_only, strip_sql
+
+# Query-cost audit of the LLM_returned_SQL_query entries of NL2SQL.csv,
+# meant to be run against a scaled dataset (see gen_data.py):
+#   python nl2sql_audit.py [nl2sql_csv] [max_work] [timeout_s]
+# MySQL: EXPLAIN FORMAT=JSON gives the estimated cost and rows, full scans,
+# temporary tables and filesorts; EXPLAIN ANALYZE runs the query and gives
+# the rows actually read from tables and indexes.
+# SQLite: EXPLAIN QUERY PLAN gives the scans, temp B-trees and sorts (there
+# are no estimates), and running the query gives the virtual machine
+# instructions it executed, reported as vm_steps in place of rows_read;
+# it is run a second time, without the step counter, for ms.
+# Queries are ranked per LLM_model_name, most expensive first (measured
+# work, then estimated cost, then time); one doing more than max_work
+# (rows read on MySQL, VM steps on SQLite), or failing, is marked reject.
+
+# Table access iterators of an EXPLAIN ANALYZE tree, with their estimate
+# and measurement
+ANALYZE_ACCESS = re.compile(r'\s*-> ([A-Za-z -]*(?:scan|lookup|search)[A-Za-z ()-]*?) on (\S+)')
+ANALYZE_ACTUAL = re.compile(r'\(actual time=[\d.e+-]+\.\.([\d.e+-]+) rows=([\d.e+-]+) loops=(\d+)\)')
+
+# VM instructions between progress handler calls when counting SQLite
+# work, so vm_steps is exact to this many. At this rate the handler
+# slows the query down by well over half, so ms comes from a separate
+# run that only checks the deadline, every SQLITE_TIMEOUT_STEP steps
+SQLITE_STEP = 10
+SQLITE_TIMEOUT_STEP = 100000
+
+
+def _mysql_audit(conn, sql, timeout):
+    cursor = conn.cursor()
+    cursor.execute(f"SET SESSION MAX_EXECUTION_TIME = {int(timeout * 1000)}")
+    cursor.execute("EXPLAIN FORMAT=JSON " + sql)
+    plan = json.loads(cursor.fetchone()[0])
+    nodes = list(_plan_nodes(plan))
+    audit = {
+        'est_cost': float(plan.get('query_block', {}).get('cost_info', {}).get('query_cost', 0)),
+        'est_rows': sum(float(node.get('rows_examined_per_scan', 0)) for node in nodes),
+        'full_scans': sorted({node['table_name'] for node in nodes if node['access_type'] == 'ALL'}),
+        'temp_tables': int(_has_key(plan, 'using_temporary_table')),
+        'filesort': _uses_filesort(plan)
+    }
+    start = time.perf_counter()
+    try:
+        cursor.execute("EXPLAIN ANALYZE " + sql)
+        tree = cursor.fetchone()[0]
+    except project.Error as e:
+        if getattr(e, 'errno', None) == ER_QUERY_TIMEOUT:
+            raise
+        # Servers before 8.0.18 have no EXPLAIN ANALYZE; keep the estimates
+        return dict(audit, rows_read=None, result_rows=None, ms=None)
+    finally:
+        cursor.close()
+    rows_read = 0
+    for line in tree.splitlines():
+        actual = ANALYZE_ACTUAL.search(line)
+        if actual and ANALYZE_ACCESS.match(line):
+            rows_read += float(actual.group(2)) * int(actual.group(3))
+    root = ANALYZE_ACTUAL.search(tree)
+    return dict(audit, rows_read=int(rows_read),
+                result_rows=int(float(root.group(2))) if root else None,
+                ms=float(root.group(1)) if root else (time.perf_counter() - start) * 1000)
+
+
+def _has_key(plan, key):
+    if isinstance(plan, dict):
+        return plan.get(key) is True or any(_has_key(v, key) for v in plan.values())
+    if isinstance(plan, list):
+        return any(_has_key(v, key) for v in plan)
+    return False
+
+
+def _sqlite_audit(conn, sql, timeout):
+    details = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+    steps = [0]
+
+    def run(step):
+        deadline = time.perf_counter() + timeout
+
+        def progress():
+            steps[0] += step
+            return time.perf_counter() > deadline
+
+        conn.set_progress_handler(progress, step)
+        start = time.perf_counter()
+        try:
+            rows = len(conn.execute(sql).fetchall())
+        finally:
+            conn.set_progress_handler(None, 0)
+        return rows, (time.perf_counter() - start) * 1000
+
+    result_rows, ms = run(SQLITE_TIMEOUT_STEP)
+    steps[0] = 0
+    run(SQLITE_STEP)
+    return {
+        'est_cost': None,
+        'est_rows': None,
+        'full_scans': sorted({m.group(1) for d in details for m in [re.fullmatch(r'SCAN (\S+)', d)] if m}),
+        'temp_tables': sum(d.startswith(('USE TEMP B-TREE FOR DISTINCT', 'USE TEMP B-TREE FOR GROUP BY',
+                                         'MATERIALIZE')) for d in details),
+        'filesort': any('B-TREE FOR ORDER BY' in d or 'PART OF ORDER BY' in d for d in details),
+        'vm_steps': steps[0],
+        'result_rows': result_rows,
+        'ms': ms
+    }
+
+
+def audit_query(conn, backend, sql, timeout):
+    sql = strip_sql(sql)
+    if not READ_ONLY.match(sql):
+        return {'status': 'rejected', 'error': "not a SELECT statement"}
+    try:
+        if backend == 'sqlite':
+            audit = _sqlite_audit(conn, sql, timeout)
+        else:
+            audit = _mysql_audit(conn, sql, timeout)
+    except (sqlite3.Error, project.Error) as e:
+        timed_out = str(e) == 'interrupted' or getattr(e, 'errno', None) == ER_QUERY_TIMEOUT
+        return {'status': 'timeout' if timed_out else 'error', 'error': str(e)}
+    return dict(audit, status='ok')
+
+
+def _work(audit):
+    # Rows read on MySQL, VM steps on SQLite
+    return audit.get('rows_read') or audit.get('vm_steps') or 0
+
+
+def _cost(audit):
+    # Measured work first, then the optimizer estimate, then time, so
+    # queries that measure the same still rank by something
+    return (_work(audit), audit.get('est_cost') or 0, audit.get('ms') or 0)
+
+
+def _fmt(val):
+    if val is None:
+        return ''
+    if isinstance(val, float):
+        return f"{val:.1f}"
+    if isinstance(val, list):
+        return ';'.join(val)
+    return str(val)
+
+
+def main():
+    csv_file = sys.argv[1] if len(sys.argv) > 1 else project.NL2SQL_FILE
+    max_work = int(sys.argv[2]) if len(sys.argv) > 2 else 1000000
+    timeout = float(sys.argv[3]) if len(sys.argv) > 3 else 30.0
+    backend = project.DB_BACKEND
+    conn = connect_read_only(backend)
+    by_model = {}
+    try:
+        for entry in read_nl2sql(csv_file):
+            audit = audit_query(conn, backend, entry['LLM_returned_SQL_query'], timeout)
+            by_model.setdefault(entry.get('LLM_model_name', ''), []).append((entry, audit))
+    finally:
+        conn.close()
+
+    work = 'vm_steps' if backend == 'sqlite' else 'rows_read'
+    columns = ('est_cost', 'est_rows', work, 'result_rows', 'ms', 'full_scans', 'temp_tables', 'filesort')
+    print("LLM_model_name,rank,NLquery_id,LLM_returned_SQL_id,status," + ",".join(columns) + ",verdict")
+    for model, audits in by_model.items():
+        audits.sort(key=lambda item: _cost(item[1]), reverse=True)
+        for rank, (entry, audit) in enumerate(audits, 1):
+            reject = audit['status'] != 'ok' or _work(audit) > max_work
+            print(f"{model},{rank},{entry['NLquery_id']},{entry.get('LLM_returned_SQL_id', '')},{audit['status']},"
+                  + ",".join(_fmt(audit.get(name)) for name in columns)
+                  + f",{'reject' if reject else 'accept'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ALL_COMPLETED, FIRST_COMPLETED, wait
+from datetime import date
+from decimal import Decimal
+
+import project
+from project import TABLE_DDL, read_nl2sql
+
+# Grades the LLM_returned_SQL_query entries of NL2SQL.csv against the loaded
+# database (CS122A_BACKEND as for project.py):
+#   python nl2sql_eval.py [nl2sql_csv] [workers] [timeout_s] [references.json]
+# The CSV is read in one pass. Each query runs read-only, with its own
+# timeout, on a process pool. Result sets are fingerprinted as a hash of
+# their sorted rows, since rows come back in no guaranteed order without
+# ORDER BY. Each entry is then compared with the reference for its
+# NLquery_id: the SQL in references.json ({"NLquery_id": "sql"}), or else
+# the first entry judged SQL_correct. Results are cached by SQL text and
+# data version, so a rerun only executes queries that are new or changed,
+# or any query once the data has been reloaded.
+# Output: one CSV line per entry, then per-model totals.
+
+CACHE_FILE = ".nl2sql_cache.json"
+
+# Statements allowed to run; anything else is reported as rejected
+READ_ONLY = re.compile(r'(SELECT|WITH)\b', re.I)
+
+# MySQL: statement exceeded MAX_EXECUTION_TIME
+ER_QUERY_TIMEOUT = 3024
+
+_worker = {}
+
+
+def strip_sql(sql):
+    # Leading comments and the trailing semicolon go; the rest runs as is
+    sql = re.sub(r'^\s*(--[^\n]*\n\s*|/\*.*?\*/\s*)*', '', sql, flags=re.S)
+    return sql.strip().rstrip(';').strip()
+
+
+def data_version():
+    # Changes whenever the loaded data does
+    if project.DB_BACKEND == 'sqlite':
+        path = project.SQLITE_CONFIG['path']
+        if path == ':memory:':
+            sys.exit("nl2sql_eval needs a SQLite file, not ':memory:'")
+        st = os.stat(path)
+        return f"sqlite:{st.st_size}:{st.st_mtime_ns}"
+    conn = project._connect(project.DB_CONFIG)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"CHECKSUM TABLE {', '.join(TABLE_DDL)}")
+        return "mysql:" + ":".join(str(row[1]) for row in cursor.fetchall())
+    finally:
+        conn.close()
+
+
+def connect_read_only(backend):
+    # A raw sqlite3 connection (so a progress handler can enforce timeouts)
+    # or a MySQL connection whose session refuses writes
+    if backend == 'sqlite':
+        uri = f"file:{project.SQLITE_CONFIG['path']}?mode=ro"
+        return sqlite3.connect(uri, uri=True)
+    conn = project._connect(project.DB_CONFIG)
+    conn.autocommit = True
+    conn.cursor().execute("SET SESSION TRANSACTION READ ONLY")
+    return conn
+
+
+def _init_worker(backend):
+    _worker['conn'] = connect_read_only(backend)
+    _worker['backend'] = backend
+
+
+def _normalize(val):
+    if isinstance(val, (Decimal, float)):
+        val = round(float(val), 6)
+        return int(val) if val.is_integer() else val
+    if isinstance(val, date):
+        return val.isoformat()
+    if isinstance(val, (bytes, bytearray)):
+        return val.decode('utf-8', 'replace')
+    return val
+
+
+def fingerprint(rows):
+    lines = sorted(repr(tuple(_normalize(v) for v in row)) for row in rows)
+    return hashlib.sha1("\n".join(lines).encode()).hexdigest()
+
+
+def run_query(sql, timeout):
+    # Runs in a pool process; returns a JSON-able result record
+    conn, backend = _worker['conn'], _worker['backend']
+    sql = strip_sql(sql)
+    if not READ_ONLY.match(sql):
+        return {'status': 'rejected', 'error': "not a SELECT statement"}
+    start = time.perf_counter()
+    try:
+        if backend == 'sqlite':
+            deadline = start + timeout
+            conn.set_progress_handler(lambda: time.perf_counter() > deadline, 10000)
+            rows = conn.execute(sql).fetchall()
+        else:
+            cursor = conn.cursor()
+            cursor.execute(f"SET SESSION MAX_EXECUTION_TIME = {int(timeout * 1000)}")
+            cursor.execute(sql)
+            rows = cursor.fetchall()
+            cursor.close()
+    except (sqlite3.Error, project.Error) as e:
+        elapsed = time.perf_counter() - start
+        timed_out = (backend == 'sqlite' and str(e) == 'interrupted') or \
+            getattr(e, 'errno', None) == ER_QUERY_TIMEOUT
+        return {'status': 'timeout' if timed_out else 'error', 'error': str(e),
+                'ms': elapsed * 1000}
+    return {'status': 'ok', 'fingerprint': fingerprint(rows), 'rows': len(rows),
+            'ms': (time.perf_counter() - start) * 1000}
+
+
+def cache_key(sql, version):
+    return hashlib.sha1(f"{version}\0{strip_sql(sql)}".encode()).hexdigest()
+
+
+def load_cache(version):
+    try:
+        with open(CACHE_FILE) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    # Entries for older data can never be hit again
+    return cache if cache.get('__version__') == version else {}
+
+
+# Fields kept per entry once its query has been submitted
+KEPT_FIELDS = ('NLquery_id', 'LLM_returned_SQL_id', 'LLM_model_name', 'SQL_correct', 'reference')
+
+
+def _collect(in_flight, cache, return_when):
+    finished, _ = wait(in_flight, return_when=return_when)
+    for future in finished:
+        cache[in_flight.pop(future)] = future.result()
+
+
+def evaluate(entries, workers, timeout, cache, version):
+    # Runs every query not in the cache, with a bounded number in flight so
+    # memory stays flat; returns [(entry, cache key)] in input order
+    graded, submitted, in_flight = [], set(), {}
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(project.DB_BACKEND,)) as executor:
+        for entry in entries:
+            sql = entry['LLM_returned_SQL_query']
+            key = cache_key(sql, version)
+            graded.append(({name: entry[name] for name in KEPT_FIELDS if name in entry}, key))
+            if key in cache or key in submitted:
+                continue
+            submitted.add(key)
+            in_flight[executor.submit(run_query, sql, timeout)] = key
+            if len(in_flight) >= workers * 4:
+                _collect(in_flight, cache, FIRST_COMPLETED)
+        _collect(in_flight, cache, ALL_COMPLETED)
+    return graded
+
+
+def main():
+    csv_file = sys.argv[1] if len(sys.argv) > 1 else project.NL2SQL_FILE
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 4
+    timeout = float(sys.argv[3]) if len(sys.argv) > 3 else 10.0
+    references = {}
+    if len(sys.argv) > 4:
+        with open(sys.argv[4]) as f:
+            references = {str(k): v for k, v in json.load(f).items()}
+
+    version = data_version()
+    cache = load_cache(version)
+    cache['__version__'] = version
+
+    def entries():
+        for nl_id, sql in references.items():
+            yield {'NLquery_id': nl_id, 'LLM_returned_SQL_query': sql, 'reference': True}
+        yield from read_nl2sql(csv_file)
+
+    results = evaluate(entries(), workers, timeout, cache, version)
+    with open(CACHE_FILE, 'w') as f:
+        json.dump(cache, f)
+
+    # Reference fingerprints: from the references file, else the first
+    # entry judged correct for the same NL query that ran
+    reference_prints = {}
+    for entry, key in results:
+        nl_id, result = entry['NLquery_id'], cache[key]
+        if entry.get('reference') or (nl_id not in reference_prints and result['status'] == 'ok'
+                                      and entry.get('SQL_correct', '').upper() == 'TRUE'):
+            reference_prints.setdefault(nl_id, result.get('fingerprint'))
+
+    print("NLquery_id,LLM_returned_SQL_id,LLM_model_name,status,rows,ms,matches_reference,SQL_correct,agrees")
+    totals = {}
+    for entry, key in results:
+        if entry.get('reference'):
+            continue
+        result = cache[key]
+        reference = reference_prints.get(entry['NLquery_id'])
+        if reference is None:
+            matches = ''
+        else:
+            matches = 'TRUE' if result.get('fingerprint') == reference else 'FALSE'
+        judged = entry.get('SQL_correct', '').upper()
+        agrees = str(matches == judged).upper() if matches and judged in ('TRUE', 'FALSE') else ''
+        model = entry.get('LLM_model_name', '')
+        print(f"{entry['NLquery_id']},{entry.get('LLM_returned_SQL_id', '')},{model},{result['status']},"
+              f"{result.get('rows', '')},{result.get('ms', 0):.1f},{matches},{judged},{agrees}")
+        t = totals.setdefault(model, {'graded': 0, 'ran': 0, 'matches': 0, 'judged_correct': 0, 'agrees': 0})
+        t['graded'] += 1
+        t['ran'] += result['status'] == 'ok'
+        t['matches'] += matches == 'TRUE'
+        t['judged_correct'] += judged == 'TRUE'
+        t['agrees'] += agrees == 'TRUE'
+    print("LLM_model_name,graded,ran,matches_reference,judged_correct,agrees_with_judgment")
+    for model, t in totals.items():
+        print(f"{model},{t['graded']},{t['ran']},{t['matches']},{t['judged_correct']},{t['agrees']}")
+
+
+if __name__ == "__main__":
+    main()
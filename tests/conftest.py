@@ -0,0 +1,46 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# The backend is chosen when project is imported, so these have to be set
+# first. Every test runs against a SQLite file; no server is needed.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ['CS122A_BACKEND'] = 'sqlite'
+os.environ['CS122A_SQLITE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='cs122a-test-'), 'test.sqlite3')
+os.environ.pop('CS122A_TRACE', None)
+os.environ.pop('CS122A_SLOW_LOG', None)
+sys.path.insert(0, ROOT)
+
+import project  # noqa: E402
+
+SAMPLE_FOLDER = os.path.join(ROOT, "test_data_project_122a")
+
+
+def rows(query, params=None):
+    conn = project.get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        result = cursor.fetchall()
+        cursor.close()
+        return result
+    finally:
+        project.release_db_connection(conn)
+
+
+@pytest.fixture
+def db(capsys):
+    # A freshly imported copy of the sample data and an empty result cache
+    assert project.import_data(SAMPLE_FOLDER)
+    capsys.readouterr()
+    project.result_cache.clear()
+    return project
+
+
+@pytest.fixture(scope='session', autouse=True)
+def close_pool():
+    yield
+    if project._pool is not None:
+        project._pool.close()
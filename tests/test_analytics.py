@@ -0,0 +1,34 @@
+import pytest
+
+import project
+from conftest import SAMPLE_FOLDER
+
+np = pytest.importorskip("numpy")
+import analytics  # noqa: E402
+import gen_data  # noqa: E402
+
+
+def test_engine_matches_sql_on_sample(db, capsys):
+    engine = analytics.Analytics(analytics.load_tables())
+    assert analytics.verify(engine, 50)
+    assert "mismatches,0" in capsys.readouterr().out
+
+
+def test_engine_matches_sql_on_generated_data(tmp_path, capsys):
+    folder = str(tmp_path / "gen")
+    gen_data.generate(folder, 5000, skew=1.0, seed=7, sample=SAMPLE_FOLDER)
+    assert project.import_data(folder)
+    project.result_cache.clear()
+    engine = analytics.Analytics(analytics.load_tables())
+    assert analytics.verify(engine, 40)
+    assert "mismatches,0" in capsys.readouterr().out
+
+
+def test_engine_loads_from_snapshot(db, tmp_path, capsys):
+    path = str(tmp_path / "sample.snap")
+    assert db.export_snapshot(path)
+    from_db = analytics.Analytics(analytics.load_tables())
+    from_snapshot = analytics.Analytics(analytics.load_tables(path))
+    assert from_snapshot.count_customized_model() == from_db.count_customized_model()
+    assert from_snapshot.top_n_duration_config(3) == from_db.top_n_duration_config(3)
+    assert from_snapshot.list_internet_service() == from_db.list_internet_service()
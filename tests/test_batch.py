@@ -0,0 +1,48 @@
+import io
+import subprocess
+import sys
+
+import project
+from conftest import ROOT, SAMPLE_FOLDER, rows
+
+
+def _cli(*args, stdin=None):
+    result = subprocess.run([sys.executable, "project.py", *args], cwd=ROOT, input=stdin,
+                            capture_output=True, text=True, check=True)
+    return result.stdout
+
+
+def test_batch_output_matches_single_commands(db):
+    bmid = rows("SELECT bmid FROM ModelServices ORDER BY bmid LIMIT 1")[0][0]
+    uid = rows("SELECT client_uid FROM Configuration ORDER BY client_uid LIMIT 1")[0][0]
+    mid = rows("SELECT MAX(mid) FROM CustomizedModel")[0][0] + 1
+    # Reads before and after writes, so a stale connection or cache in the
+    # long-lived batch process would show up as a difference
+    commands = [
+        f"listInternetService {bmid}",
+        f"countCustomizedModel {bmid} {bmid + 1}",
+        f"topNDurationConfig {uid} 3",
+        "listBaseModelKeyWord a",
+        f"addCustomizedModel {mid} {bmid}",
+        f"addCustomizedModel {mid} {bmid}",
+        f"countCustomizedModel {bmid} {bmid + 1}",
+        f"deleteBaseModel {bmid}",
+        f"listInternetService {bmid}",
+        f"countCustomizedModel {bmid} {bmid + 1}",
+        f"topNDurationConfig {uid} 3",
+    ]
+    single = "".join(_cli(*command.split()) for command in commands)
+    assert project.import_data(SAMPLE_FOLDER)
+    assert _cli("batch", stdin="\n".join(commands) + "\n") == single
+    assert "Success" in single and "Fail" in single
+
+
+def test_batch_survives_failing_commands(db, capsys):
+    project.run_batch(io.StringIO(
+        "# comment\n"
+        "insertAgentClientBulk /nonexistent/clients.csv\n"
+        "exportSnapshot /nonexistent/dir/out.snap\n"
+        "countCustomizedModel 1\n"))
+    out = capsys.readouterr().out.splitlines()
+    assert out[0].startswith("Fail: ") and out[1].startswith("Fail: ")
+    assert out[2].startswith("1,")
@@ -0,0 +1,66 @@
+import time
+
+from project import ResultCache
+from conftest import rows
+
+
+def _bmid_with_services():
+    return rows("SELECT bmid FROM ModelServices ORDER BY bmid LIMIT 1")[0][0]
+
+
+def test_cache_lru_ttl_and_invalidation():
+    cache = ResultCache(size=2, ttl=60)
+    cache.put(("f", 1), [(1,)], {1})
+    cache.put(("g", 2), [(2,)], {2})
+    assert cache.get(("f", 1)) == [(1,)]
+    cache.put(("f", 3), [(3,)], {3})
+    # ("g", 2) was least recently used
+    assert cache.get(("g", 2)) is None
+    cache.invalidate(1, {"g"})
+    assert cache.get(("f", 1)) == [(1,)]
+    cache.invalidate(1)
+    assert cache.get(("f", 1)) is None
+
+    cache = ResultCache(size=2, ttl=0)
+    cache.put(("f", 1), [(1,)], {1})
+    time.sleep(0.01)
+    assert cache.get(("f", 1)) is None
+    assert cache.stats['expirations'] == 1
+
+
+def test_list_results_served_from_cache(db, capsys):
+    bmid = _bmid_with_services()
+    db.listInternetService(bmid)
+    first = capsys.readouterr().out
+    assert first
+    # A write behind the module's back is not seen until the entry goes
+    conn = db.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM ModelServices WHERE bmid=%s", (bmid,))
+    conn.commit()
+    cursor.close()
+    db.release_db_connection(conn)
+    db.listInternetService(bmid)
+    assert capsys.readouterr().out == first
+    db.result_cache.invalidate(bmid)
+    db.listInternetService(bmid)
+    assert capsys.readouterr().out == ""
+
+
+def test_writes_invalidate_dependent_entries(db, capsys):
+    bmid = _bmid_with_services()
+    db.countCustomizedModel(bmid)
+    count = int(capsys.readouterr().out.strip().split(",")[-1])
+    mid = rows("SELECT MAX(mid) FROM CustomizedModel")[0][0] + 1
+    assert db.addCustomizedModel(mid, bmid)
+    capsys.readouterr()
+    db.countCustomizedModel(bmid)
+    assert int(capsys.readouterr().out.strip().split(",")[-1]) == count + 1
+
+    db.listInternetService(bmid)
+    assert capsys.readouterr().out
+    assert db.deleteBaseModel(bmid)
+    capsys.readouterr()
+    db.listInternetService(bmid)
+    db.countCustomizedModel(bmid)
+    assert capsys.readouterr().out == ""
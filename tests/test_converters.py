@@ -0,0 +1,24 @@
+from datetime import date
+
+from project import compile_row_converter
+
+
+def test_row_converter_types_and_nulls():
+    convert = compile_row_converter("AgentClient")
+    # uid, interests, cardholder, expire, cardno, cvv, zip
+    assert convert(["7", "Tools", "A B", "2030-01-31", "1234567812345678", "123", "NULL"]) == \
+        (7, "Tools", "A B", date(2030, 1, 31), 1234567812345678, 123, None)
+    assert convert(["7", "", "null", "", "", "", ""]) == (7, None, None, None, None, None, None)
+
+
+def test_row_converter_passes_bad_values_through():
+    convert = compile_row_converter("AgentClient")
+    # Left for the server to reject rather than silently dropped
+    assert convert(["x", "T", "A", "31/01/2030", "1", "2", "3"])[0] == "x"
+    assert convert(["x", "T", "A", "31/01/2030", "1", "2", "3"])[3] == "31/01/2030"
+
+
+def test_row_converter_keeps_malformed_rows():
+    convert = compile_row_converter("BaseModel")
+    assert convert(["1", "2"]) == ("1", "2")
+
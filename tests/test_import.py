@@ -0,0 +1,20 @@
+import pytest
+
+import project
+
+
+def test_load_worker_reports_bad_files_as_errors(db, tmp_path):
+    path = tmp_path / "BaseModel.csv"
+    path.write_bytes(b"bmid,creator_uid,description\n1,1,caf\xe9\n")
+    state = {'load_data': False, 'relaxed': False}
+    with pytest.raises(project.Error, match="BaseModel: ") as info:
+        project._load_worker("BaseModel", str(path), state)
+    assert isinstance(info.value.__cause__, UnicodeDecodeError)
+
+
+def test_line_terminator_detection(tmp_path):
+    cases = {b"a,b\r\n1,2\r\n": b"\r\n", b"a,b\n1,2\n": b"\n", b"a,b\r1,2\r": None, b"a,b": b"\n"}
+    for data, expected in cases.items():
+        path = tmp_path / "t.csv"
+        path.write_bytes(data)
+        assert project._line_terminator(str(path)) == expected
@@ -0,0 +1,39 @@
+import pytest
+
+import project
+from conftest import rows
+
+
+def test_rows_are_typed_and_match_cli_output(db, capsys):
+    bmid = rows("SELECT bmid FROM ModelServices ORDER BY bmid LIMIT 1")[0][0]
+    uid = rows("SELECT client_uid FROM ConfigMaxDuration ORDER BY client_uid LIMIT 1")[0][0]
+    calls = [
+        (db.list_internet_service, db.listInternetService, (bmid,), project.ServiceRow),
+        (db.count_customized_model, db.countCustomizedModel, (1, 2, 3), project.ModelCountRow),
+        (db.top_n_duration_config, db.topNDurationConfig, (uid, 3), project.DurationConfigRow),
+        (db.list_base_model_keyword, db.listBaseModelKeyWord, ("a",), project.KeywordRow)
+    ]
+    for api, cli, args, row_type in calls:
+        db.result_cache.clear()
+        result = list(api(*args))
+        assert result and all(type(row) is row_type for row in result)
+        db.result_cache.clear()
+        cli(*args)
+        assert capsys.readouterr().out == "".join(project._format_row(row) + "\n" for row in result)
+
+
+def test_raw_decoder_builds_rows_from_bytes():
+    decode = project.RAW_ROW_DECODERS[project.DurationConfigRow]
+    row = decode((bytearray(b"7"), b"12", None, bytearray("xé".encode()), b"40"))
+    assert row == project.DurationConfigRow(7, 12, None, "xé", 40)
+
+
+def test_cli_prints_only_the_connection_error(db, capsys, monkeypatch):
+    def refuse():
+        raise project.Error(msg="unable to open database file")
+    monkeypatch.setattr(project, "_checkout", refuse)
+    db.result_cache.clear()
+    db.countCustomizedModel(1)
+    assert capsys.readouterr().out == "Error connecting to SQLite: unable to open database file\n"
+    with pytest.raises(project.Error, match="no database connection"):
+        list(db.count_customized_model(1))
@@ -0,0 +1,72 @@
+import threading
+import time
+
+import pytest
+
+from project import ConnectionPool, Error, PoolError
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool({'path': str(tmp_path / "pool.sqlite3")}, size=1, timeout=0.05, validate_idle=0)
+    yield pool
+    pool.close()
+
+
+def test_checkout_reuses_returned_connections(pool):
+    conn = pool.get()
+    pool.put(conn)
+    assert pool.get() is conn
+    assert pool.stats['checkouts'] == 2 and pool.stats['misses'] == 1
+    pool.put(conn)
+
+
+def test_stale_idle_connection_is_replaced(pool):
+    conn = pool.get()
+    pool.put(conn)
+    # Dropped while idle, as a server-side timeout would
+    conn._open = False
+    time.sleep(0.01)
+    fresh = pool.get()
+    assert fresh is not conn and fresh.is_connected()
+    assert pool.stats['stale'] == 1 and pool.stats['misses'] == 2
+    pool.put(fresh)
+
+
+def test_recent_connections_skip_validation(pool):
+    pool.validate_idle = 60
+    conn = pool.get()
+    pool.put(conn)
+    conn._open = False
+    assert pool.get() is conn
+    assert pool.stats['stale'] == 0
+    conn._open = True
+    pool.put(conn)
+
+
+def test_checkout_times_out_on_full_pool(pool):
+    conn = pool.get()
+    with pytest.raises(PoolError):
+        pool.get()
+    assert pool.stats['timeouts'] == 1
+    pool.put(conn)
+
+
+def test_checkout_waits_for_a_returned_connection(pool):
+    pool.timeout = 5
+    conn = pool.get()
+    timer = threading.Timer(0.05, pool.put, (conn,))
+    timer.start()
+    assert pool.get() is conn
+    timer.join()
+    assert pool.stats['waits'] == 1 and pool.stats['max_wait'] >= 0.04
+    pool.put(conn)
+
+
+def test_failed_connect_frees_its_slot(tmp_path):
+    pool = ConnectionPool({'path': str(tmp_path / "missing" / "pool.sqlite3")}, size=1, timeout=0.05)
+    for _ in range(2):
+        # A timeout here would mean the first failure kept the slot
+        with pytest.raises(Error, match="unable to open"):
+            pool.get()
+    assert pool.stats['timeouts'] == 0
@@ -0,0 +1,78 @@
+from datetime import date
+
+import project
+from project import TABLE_DDL, Snapshot, compile_tsv_formatter
+from conftest import rows
+
+
+def _table_rows(table):
+    # DATE columns come back from SQLite as ISO text and from a snapshot as dates
+    return sorted(tuple(None if v is None else str(v) for v in row)
+                  for row in rows(f"SELECT * FROM {table}"))
+
+
+def test_snapshot_round_trip(db, tmp_path):
+    path = str(tmp_path / "sample.snap")
+    before = {table: _table_rows(table) for table in TABLE_DDL}
+    assert db.export_snapshot(path)
+
+    snapshot = Snapshot(path)
+    try:
+        for table in TABLE_DDL:
+            decoded = [row for batch in snapshot.batches(table, 7) for row in batch]
+            assert sorted(tuple(None if v is None else str(v) for v in row) for row in decoded) == before[table]
+    finally:
+        snapshot.close()
+
+    assert db.import_data(path)
+    assert {table: _table_rows(table) for table in TABLE_DDL} == before
+    assert db.check_model_counts()
+    assert db.check_duration_summary()
+
+
+def test_snapshot_rejects_other_files(db, tmp_path, capsys):
+    path = tmp_path / "not_a_snapshot"
+    path.write_bytes(b"CS122SNP" + b"\0" * 32)
+    assert not project.import_data(str(path))
+    assert capsys.readouterr().out.startswith("Fail")
+    # The failed import leaves the loaded tables alone
+    assert rows("SELECT COUNT(*) FROM BaseModel")[0][0] > 0
+
+
+class _LoadDataCursor:
+    # Stands in for a MySQL cursor: records the rows in each file LOAD DATA
+    # is given, and reports no warnings
+    def __init__(self):
+        self.files = []
+        self.rowcount = 0
+
+    def execute(self, query, params=None):
+        if "LOAD DATA" in query:
+            with open(params[0], encoding="utf-8") as f:
+                self.files.append(f.read().splitlines())
+            self.rowcount = len(self.files[-1])
+
+    def fetchone(self):
+        return (0,)
+
+
+def test_snapshot_load_data_uses_bounded_files(db, tmp_path, monkeypatch):
+    path = str(tmp_path / "sample.snap")
+    assert db.export_snapshot(path)
+    expected = rows("SELECT COUNT(*) FROM ModelConfigurations")[0][0]
+    monkeypatch.setitem(project.IMPORT_CONFIG, "load_data_rows", 7)
+    cursor = _LoadDataCursor()
+    snapshot = Snapshot(path)
+    try:
+        assert project._load_data_snapshot(cursor, "ModelConfigurations", snapshot) == expected
+    finally:
+        snapshot.close()
+    assert len(cursor.files) > 1
+    assert all(len(lines) <= 7 for lines in cursor.files)
+    assert sum(map(len, cursor.files)) == expected
+
+
+def test_tsv_formatter_escapes_and_nulls():
+    fmt = compile_tsv_formatter("AgentClient")
+    line = fmt((1, "a\tb\\c\nd\r", None, date(2030, 1, 2), None, 3, 4))
+    assert line == "1\ta\\tb\\\\c\\nd\\r\t\\N\t2030-01-02\t\\N\t3\t4\n"
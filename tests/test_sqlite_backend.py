@@ -0,0 +1,23 @@
+import pytest
+
+import project
+from conftest import rows
+
+
+def test_failed_import_restores_pragmas_and_keeps_tables(db, monkeypatch):
+    before = rows("SELECT COUNT(*) FROM BaseModel")
+
+    def interrupted(*args):
+        raise RuntimeError("interrupted mid-load")
+    monkeypatch.setattr(project, "_load_table", interrupted)
+    # The original exception comes through, not a PRAGMA error
+    with pytest.raises(RuntimeError, match="interrupted mid-load"):
+        project.import_data("test_data_project_122a")
+    monkeypatch.undo()
+
+    assert rows("SELECT COUNT(*) FROM BaseModel") == before
+    # Every pooled connection still enforces foreign keys
+    for _ in range(project.POOL_CONFIG['size']):
+        assert rows("PRAGMA foreign_keys") == [(1,)]
+    assert project.deleteBaseModel(1)
+    assert rows("PRAGMA foreign_key_check") == []
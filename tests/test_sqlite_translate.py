@@ -0,0 +1,45 @@
+from project import _sqlite_translate
+
+
+def test_placeholders_become_question_marks():
+    assert _sqlite_translate("SELECT a FROM t WHERE a=%s AND b=%s", True) == \
+        ["SELECT a FROM t WHERE a=? AND b=?"]
+
+
+def test_literal_percent_kept_with_params():
+    assert _sqlite_translate("SELECT a FROM t WHERE a LIKE '%%x' AND b=%s", True) == \
+        ["SELECT a FROM t WHERE a LIKE '%x' AND b=?"]
+
+
+def test_no_params_leaves_percent_signs():
+    assert _sqlite_translate("SELECT DATE_FORMAT(d, '%Y') FROM t", False) == \
+        ["SELECT DATE_FORMAT(d, '%Y') FROM t"]
+
+
+def test_inline_index_becomes_create_index():
+    ddl = """
+    CREATE TABLE T (
+        a INT PRIMARY KEY,
+        b INT,
+        INDEX idx_t_b (b, a)
+    )
+    """
+    table, index = _sqlite_translate(ddl, False)
+    assert "INDEX" not in table
+    assert "b INT" in table
+    assert index == "CREATE INDEX idx_t_b ON T (b, a)"
+
+
+def test_row_value_in_list_uses_values():
+    sql, = _sqlite_translate("SELECT 1 FROM t WHERE (a, b) IN ((%s,%s),(%s,%s))", True)
+    assert sql == "SELECT 1 FROM t WHERE (a, b) IN (VALUES (?,?),(?,?))"
+
+
+def test_delete_limit_uses_rowid_subquery():
+    sql, = _sqlite_translate("DELETE FROM T WHERE bmid=%s LIMIT 50", True)
+    assert sql == "DELETE FROM T WHERE rowid IN (SELECT rowid FROM T WHERE bmid=? LIMIT 50)"
+
+
+def test_translations_are_memoized():
+    query = "SELECT a FROM memo WHERE a=%s"
+    assert _sqlite_translate(query, True) is _sqlite_translate(query, True)
@@ -0,0 +1,28 @@
+import project
+from conftest import SAMPLE_FOLDER, rows
+
+
+def test_summary_reads_live_without_triggers(monkeypatch, capsys):
+    def refuse(cursor):
+        raise project.Error(msg="You do not have the SUPER privilege", errno=1419)
+    monkeypatch.setattr(project, "_create_triggers", refuse)
+    assert project.import_data(SAMPLE_FOLDER)
+    capsys.readouterr()
+
+    bmid, uid = rows("SELECT mc.bmid, c.client_uid FROM ModelConfigurations mc "
+                     "JOIN Configuration c ON c.cid = mc.cid ORDER BY mc.bmid LIMIT 1")[0]
+    cid = rows("SELECT cid FROM Configuration WHERE client_uid=%s LIMIT 1", (uid,))[0][0]
+    mid = rows("SELECT MAX(mid) FROM CustomizedModel")[0][0] + 1
+    # Writes behind the module's back leave the summary tables stale
+    conn = project.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO CustomizedModel (mid, bmid) VALUES (%s, %s)", (mid, bmid))
+    cursor.execute("UPDATE ModelConfigurations SET duration = 1000000 WHERE cid = %s", (cid,))
+    conn.commit()
+    cursor.close()
+    project.release_db_connection(conn)
+    project.result_cache.clear()
+
+    count = rows("SELECT COUNT(*) FROM CustomizedModel WHERE bmid=%s", (bmid,))[0][0]
+    assert list(project.count_customized_model(bmid))[0].model_count == count
+    assert list(project.top_n_duration_config(uid, 1))[0].cid == cid
@@ -0,0 +1,51 @@
+import json
+import re
+
+import project
+from project import Tracer
+
+
+def _trace(monkeypatch, **config):
+    tracer = Tracer(**config)
+    monkeypatch.setattr(project, "tracer", tracer)
+    return tracer
+
+
+def test_json_lines_and_slow_log(db, capsys, monkeypatch, tmp_path):
+    trace, slow = tmp_path / "trace.jsonl", tmp_path / "slow.jsonl"
+    tracer = _trace(monkeypatch, file=str(trace), slow_log=str(slow), slow_ms=0)
+    db.dispatch("listInternetService", ["1"])
+    out = capsys.readouterr().out
+    tracer.close()
+
+    records = [json.loads(line) for line in trace.read_text().splitlines()]
+    assert [r['event'] for r in records][0] == 'connect'
+    assert records[-1]['event'] == 'command'
+    assert all(r['command'] == 'listInternetService' for r in records)
+    queries = [r for r in records if r['event'] == 'query']
+    assert len(queries) == 1
+    assert "FROM InternetService" in queries[0]['sql']
+    assert queries[0]['rows'] == len(out.splitlines())
+
+    logged = [json.loads(line) for line in slow.read_text().splitlines()]
+    assert [r['sql'] for r in logged] == [queries[0]['sql']]
+    assert logged[0]['params'] == [1]
+
+
+def test_prometheus_totals(db, capsys, monkeypatch, tmp_path):
+    path = tmp_path / "metrics.prom"
+    tracer = _trace(monkeypatch, file=str(path))
+    db.dispatch("listInternetService", ["1"])
+    db.dispatch("countCustomizedModel", ["1", "2"])
+    db.dispatch("listInternetService", ["2"])
+    capsys.readouterr()
+    tracer.close()
+
+    text = path.read_text()
+    assert "# TYPE cs122a_queries_total counter" in text
+    samples = dict(re.findall(r'^(cs122a_\w+_total\{command="\w+"\}) (\S+)$', text, re.M))
+    assert float(samples['cs122a_commands_total{command="listInternetService"}']) == 2
+    assert float(samples['cs122a_commands_total{command="countCustomizedModel"}']) == 1
+    assert float(samples['cs122a_connects_total{command="listInternetService"}']) == 2
+    # No JSON events are written alongside the Prometheus file
+    assert not list(tmp_path.glob("*.jsonl"))
@@ -0,0 +1,72 @@
+import pytest
+
+import project
+from conftest import SAMPLE_FOLDER, rows
+
+CLIENT_HEADER = "uid,username,email,cardno,cardholder,expire,cvv,zip,interests\n"
+
+
+def test_insert_agent_client_creates_missing_user(db, capsys):
+    uid = rows("SELECT MAX(uid) FROM User")[0][0] + 1
+    assert db.insertAgentClient(uid, "new", "new@example.com", 1234, "New User",
+                                "2030-01-01", 123, 12345, "Tools")
+    assert rows("SELECT uid FROM User WHERE uid=%s", (uid,)) == [(uid,)]
+    assert not db.insertAgentClient(uid, "new", "new@example.com", 1234, "New User",
+                                    "2030-01-01", 123, 12345, "Tools")
+    assert capsys.readouterr().out == "Success\nFail\n"
+
+
+def test_bulk_insert_matches_single_row(db, capsys, tmp_path):
+    uid = rows("SELECT MAX(uid) FROM User")[0][0] + 1
+    path = tmp_path / "clients.csv"
+    path.write_text(CLIENT_HEADER
+                    + f"{uid},new,new@example.com,1234,New User,2030-01-01,123,12345,Tools\n"
+                    + f"{uid},dup,dup@example.com,1234,Dup,2030-01-01,123,12345,Tools\n"
+                    + "abc,x,x@example.com,1234,X,2030-01-01,123,12345,Tools\n")
+    assert db.insertAgentClientBulk(str(path))
+    assert capsys.readouterr().out.splitlines() == [
+        f"{uid},Success",
+        f"{uid},Fail: duplicate uid in file",
+        "abc,Fail: invalid uid"
+    ]
+    assert rows("SELECT uid FROM AgentClient WHERE uid=%s", (uid,)) == [(uid,)]
+
+
+@pytest.mark.parametrize("name, content", [
+    ("missing.csv", None),
+    ("bad.jsonl", "{not json\n"),
+    ("list.jsonl", "[1, 2]\n"),
+])
+def test_bulk_insert_reports_unreadable_files(db, capsys, tmp_path, name, content):
+    path = tmp_path / name
+    if content is not None:
+        path.write_text(content)
+    assert not db.insertAgentClientBulk(str(path))
+    assert capsys.readouterr().out.startswith("Fail: ")
+
+
+def test_summaries_kept_without_triggers(monkeypatch, capsys):
+    def refuse(cursor):
+        raise project.Error(msg="You do not have the SUPER privilege", errno=1419)
+    monkeypatch.setattr(project, "_create_triggers", refuse)
+    assert project.import_data(SAMPLE_FOLDER)
+    assert "not installed" in capsys.readouterr().err
+    assert rows("SELECT COUNT(*) FROM sqlite_master WHERE type='trigger'") == [(0,)]
+
+    bmids = [r[0] for r in rows("SELECT bmid FROM ModelConfigurations GROUP BY bmid ORDER BY bmid LIMIT 2")]
+    mid = rows("SELECT MAX(mid) FROM CustomizedModel")[0][0] + 1
+    assert project.addCustomizedModel(mid, bmids[0])
+    assert project.addCustomizedModelBatch(mid + 1, bmids[0], mid + 2, bmids[1])
+    assert project.deleteBaseModel(bmids[0])
+    assert project.deleteBaseModelBatch(bmids[1])
+    assert project.check_model_counts()
+    assert project.check_duration_summary()
+
+
+def test_summaries_kept_with_triggers(db, capsys):
+    bmid = rows("SELECT bmid FROM ModelConfigurations ORDER BY bmid LIMIT 1")[0][0]
+    mid = rows("SELECT MAX(mid) FROM CustomizedModel")[0][0] + 1
+    assert db.addCustomizedModelBatch(mid, bmid, mid + 1, bmid)
+    assert db.deleteBaseModelBatch(bmid)
+    assert db.check_model_counts()
+    assert db.check_duration_summary()